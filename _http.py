@@ -0,0 +1,212 @@
+"""Shared HTTP plumbing for the history and verification scripts.
+
+One keep-alive connection pool and one worker pool, plus the GitHub
+(ETag, rate limit) and Update API (disk cache) handling the scripts share.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import urllib3
+
+MAX_WORKERS = 16
+
+# Every request hits api.github.com or update.code.visualstudio.com, and
+# PoolManager is thread-safe, so one pool serves all scripts and threads.
+POOL = urllib3.PoolManager(
+    num_pools=2,
+    maxsize=MAX_WORKERS,
+    headers={"User-Agent": "vscode-bisect-script"},
+    retries=urllib3.Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504]),
+)
+
+# Requests are network-bound and independent, so overlap them.
+EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+atexit.register(EXECUTOR.shutdown, wait=True)
+
+# Optional; authenticated requests get 5000/hr instead of 60/hr.
+TOKEN = os.environ.get("GITHUB_TOKEN")
+_warned_no_token = False
+
+# Sidecar of page_url -> {etag, data, link}. Conditional requests that come
+# back 304 don't count against the GitHub rate limit.
+ETAG_FILE = "etags.json"
+
+# Pause before the quota runs out rather than after GitHub starts refusing.
+# Capped at a tenth of the limit so unauthenticated runs (60/hr) aren't
+# paused almost immediately.
+RATE_LIMIT_BUFFER = 50
+
+# Sidecar of Update API responses, keyed "{quality}:{version or commit}".
+# Loaded and saved on the main thread; workers only touch the dict.
+CACHE_FILE = "update_api_cache.json"
+NEGATIVE_CACHE_TTL = 60 * 60
+_cache = {}
+_cache_lock = threading.Lock()
+
+class RateLimitError(Exception):
+    """GitHub is still refusing requests after waiting out the rate limit."""
+
+    def __init__(self, reset_at):
+        super().__init__(f"GitHub rate limit exceeded until {datetime.fromtimestamp(reset_at)}")
+        self.reset_at = reset_at
+
+def parallel_map(fn, iterable, max_workers=None):
+    """Like map(), but runs fn on the shared executor. Results keep input order.
+
+    max_workers caps how many calls run at once (below MAX_WORKERS).
+    """
+    if max_workers is None or max_workers >= MAX_WORKERS:
+        return EXECUTOR.map(fn, iterable)
+    slots = threading.BoundedSemaphore(max(1, max_workers))
+
+    def bounded(item):
+        with slots:
+            return fn(item)
+
+    return EXECUTOR.map(bounded, iterable)
+
+def get_json(url, *, headers=None, timeout=None, retries=None):
+    """Returns (data, response); data is None unless the status is 200.
+
+    Connection errors (after retries) are raised by urllib3.
+    """
+    kwargs = {}
+    if headers is not None:
+        kwargs['headers'] = headers
+    if timeout is not None:
+        kwargs['timeout'] = timeout
+    if retries is not None:
+        kwargs['retries'] = retries
+    response = POOL.request("GET", url, **kwargs)
+    data = json.loads(response.data) if response.status == 200 else None
+    return data, response
+
+# --- GitHub ---
+
+def github_headers():
+    global _warned_no_token
+    headers = {"Accept": "application/vnd.github+json", "User-Agent": "vscode-bisect-script"}
+    if TOKEN:
+        headers["Authorization"] = f"token {TOKEN}"
+    elif not _warned_no_token:
+        print("Warning: No GITHUB_TOKEN set. Rate limits may apply (60/hr).")
+        _warned_no_token = True
+    return headers
+
+def load_etags():
+    try:
+        with open(ETAG_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_etags(etags):
+    # Copy first: after an error, workers that are still running may add
+    # entries while this runs.
+    snapshot = dict(etags)
+    with open(ETAG_FILE, 'w') as f:
+        json.dump(snapshot, f)
+
+def sleep_until(reset_at):
+    time.sleep(max(0, reset_at - time.time()) + 1)
+
+def rate_limit_headroom(headers):
+    """Requests left before throttle() would pause, or None if unknown."""
+    remaining = headers.get("X-RateLimit-Remaining")
+    if remaining is None:
+        return None
+    buffer = min(RATE_LIMIT_BUFFER, int(headers.get("X-RateLimit-Limit", 0)) // 10)
+    return int(remaining) - buffer
+
+def throttle(headers):
+    headroom = rate_limit_headroom(headers)
+    reset_at = headers.get("X-RateLimit-Reset")
+    if headroom is None or reset_at is None:
+        return
+    remaining = headers["X-RateLimit-Remaining"]
+    if headroom < 0:
+        print(f"\nOnly {remaining} GitHub requests left. Pausing until {datetime.fromtimestamp(int(reset_at))}...")
+        sleep_until(int(reset_at))
+
+def get_github_json(url, etags=None, _retried=False):
+    """Returns (data, headers); data is None on failure.
+
+    If an etags dict is given, the request is conditional and a 304 is
+    answered from the cached page body.
+
+    Raises RateLimitError if GitHub still refuses after one wait.
+    """
+    headers = github_headers()
+    cached = etags.get(url) if etags is not None else None
+    if cached:
+        headers["If-None-Match"] = cached['etag']
+    try:
+        data, response = get_json(url, headers=headers, timeout=30)
+    except Exception as e:
+        print(f"\nError fetching {url}: {e}")
+        return None, {}
+    if response.status == 304 and cached:
+        # Keep the rate-limit headers of the 304; only Link comes from the cache.
+        headers = response.headers.copy()
+        headers["Link"] = cached['link']
+        return cached['data'], headers
+    if response.status == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
+        reset_at = int(response.headers.get("X-RateLimit-Reset", time.time() + 60))
+    elif response.status == 403 and "Retry-After" in response.headers:
+        # Secondary rate limit
+        reset_at = int(time.time()) + int(response.headers["Retry-After"])
+    else:
+        reset_at = None
+    if reset_at is not None:
+        if _retried:
+            raise RateLimitError(reset_at)
+        print(f"\nRate limit exceeded fetching {url}. Waiting until {datetime.fromtimestamp(reset_at)}...")
+        sleep_until(reset_at)
+        return get_github_json(url, etags, _retried=True) # Retry once
+    if response.status != 200:
+        print(f"\nError fetching {url}: HTTP {response.status}")
+        return None, response.headers
+    if etags is not None and response.headers.get("ETag"):
+        etags[url] = {'etag': response.headers["ETag"], 'data': data, 'link': response.headers.get("Link", "")}
+    throttle(response.headers)
+    return data, response.headers
+
+# --- Update API ---
+
+def load_update_cache():
+    try:
+        with open(CACHE_FILE) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return
+    with _cache_lock:
+        _cache.update(entries)
+
+def save_update_cache():
+    with _cache_lock:
+        snapshot = dict(_cache)
+    with open(CACHE_FILE, 'w') as f:
+        json.dump(snapshot, f)
+
+def cached_lookup(key, fetch):
+    """Returns the cached value for key, calling fetch() on a miss.
+
+    fetch() returns (value, cacheable). Published builds never change, so hits
+    are kept forever; a None (404) is only trusted for NEGATIVE_CACHE_TTL.
+    Errors are never cached, in memory or on disk, so a later call retries.
+    """
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit is not None and (hit['value'] is not None or time.time() - hit['at'] < NEGATIVE_CACHE_TTL):
+        return hit['value']
+    value, cacheable = fetch()
+    if cacheable:
+        with _cache_lock:
+            _cache[key] = {'value': value, 'at': time.time()}
+    return value
+
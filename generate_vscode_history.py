@@ -1,68 +1,76 @@
-import urllib.request
-import urllib.error
 import json
 import re
 import sys
-import os
 import time
 from datetime import datetime
 
+from _http import (cached_lookup, get_github_json, get_json, load_etags, load_update_cache, parallel_map,
+                   rate_limit_headroom, save_etags, save_update_cache)
+
 REPO = "microsoft/vscode"
 TAGS_URL = f"https://api.github.com/repos/{REPO}/tags"
 
-# Get Token from Env
-TOKEN = os.environ.get("GITHUB_TOKEN")
+_VERSION_RE = re.compile(r'^(\d+)\.(\d+)\.(\d+)(?:-([a-zA-Z0-9]+))?$')
+_LAST_LINK_RE = re.compile(r'<([^>]*[?&]page=(\d+)[^>]*)>;\s*rel="last"')
+_PAGE_PARAM_RE = re.compile(r'([?&]page=)\d+')
 
-def get_headers():
-    if TOKEN:
-        return {"Authorization": f"token {TOKEN}", "User-Agent": "vscode-bisect-script"}
-    else:
-        print("Warning: No GITHUB_TOKEN set. Rate limits may apply (60/hr).")
-        return {"User-Agent": "vscode-bisect-script"}
+# Redraw '\r' progress lines at most this often (seconds).
+PROGRESS_INTERVAL = 0.1
+_last_progress = 0.0
 
-def fetch_json(url):
-    try:
-        req = urllib.request.Request(url, headers=get_headers())
-        with urllib.request.urlopen(req) as response:
-            return json.loads(response.read().decode())
-    except urllib.error.HTTPError as e:
-        if e.code == 403:
-            print(f"\nRate limit exceeded fetching {url}. Waiting 60s...")
-            time.sleep(60)
-            return fetch_json(url) # Retry once
-        print(f"\nError fetching {url}: {e}")
-        return None
-    except Exception as e:
-        print(f"\nError fetching {url}: {e}")
-        return None
+def progress(msg, force=False):
+    global _last_progress
+    now = time.monotonic()
+    if force or now - _last_progress >= PROGRESS_INTERVAL:
+        print(msg, end='\r')
+        _last_progress = now
 
 def fetch_all_tags():
     tags = []
-    page = 1
-    while True:
-        print(f"Fetching tags page {page}...", end='\r')
-        url = f"{TAGS_URL}?per_page=100&page={page}"
-        data = fetch_json(url)
-        
-        if not data:
-            break
-        
-        for tag in data:
-            tags.append({
-                'name': tag['name'],
-                'commit': tag['commit']['sha'],
-                'commit_url': tag['commit']['url']
-            })
-        
-        if len(data) < 100:
-            break
-        page += 1
+    etags = load_etags()
+    # Keep whatever pages were fetched (and their ETags) even if a
+    # RateLimitError aborts the run.
+    try:
+        progress("Fetching tags page 1...")
+        first_url = f"{TAGS_URL}?per_page=100"
+        # Always fetch page 1 in full: its ETag covers the body, not the Link
+        # header, so a cached Link can miss pages added since the last run.
+        etags.pop(first_url, None)
+        data, headers = get_github_json(first_url, etags)
+        pages = [data]
+
+        # Page 1 tells us how many pages there are; fetch the rest at once.
+        match = _LAST_LINK_RE.search(headers.get("Link", ""))
+        if data and match:
+            last_url, last_page = match.group(1), int(match.group(2))
+            urls = [_PAGE_PARAM_RE.sub(rf"\g<1>{page}", last_url) for page in range(2, last_page + 1)]
+            # Don't send more pages at once than page 1 says the quota allows.
+            results = parallel_map(lambda url: get_github_json(url, etags), urls,
+                                   max_workers=rate_limit_headroom(headers))
+            for page, (data, _) in enumerate(results, 2):
+                progress(f"Fetching tags page {page}/{last_page}...", force=page == last_page)
+                pages.append(data)
+
+        for data in pages:
+            if not data:
+                break
+            for tag in data:
+                tags.append({
+                    'name': tag['name'],
+                    'commit': tag['commit']['sha'],
+                    'commit_url': tag['commit']['url']
+                })
+    finally:
+        save_etags(etags)
     print(f"\nFetched {len(tags)} tags.")
     return tags
 
 def parse_version(tag_name):
     clean_name = tag_name.lstrip('v')
-    match = re.match(r'^(\d+)\.(\d+)\.(\d+)(?:-([a-zA-Z0-9]+))?$', clean_name)
+    # Cheap reject for the many non-version tags before running the regex.
+    if not clean_name or not clean_name[0].isdigit():
+        return None
+    match = _VERSION_RE.match(clean_name)
     if not match:
         return None
     
@@ -71,22 +79,7 @@ def parse_version(tag_name):
     if major >= 900: # Filter out test tags like 1.999.0
         return None
         
-    return {
-        'major': major,
-        'minor': int(minor),
-        'patch': int(patch),
-        'label': label,
-        'original': tag_name
-    }
-
-def sort_key(item):
-    v = item['version_info']
-    # Stable (None) > Insider (label) priority? 
-    # Usually we want Descending time.
-    # But here we sort by Version Number.
-    # 1.80.0 > 1.80.0-insider.
-    label_priority = 0 if v['label'] is None else -1 
-    return (v['major'], v['minor'], v['patch'], label_priority)
+    return major, int(minor), int(patch), label
 
 def get_version_metadata(version, label):
     # Use VS Code Update API to get date
@@ -103,14 +96,15 @@ def get_version_metadata(version, label):
     
     url = f"https://update.code.visualstudio.com/api/versions/{version}/darwin/{quality}"
     
-    try:
-        # 3s timeout to fail fast
-        with urllib.request.urlopen(url, timeout=3) as response:
-            if response.status == 200:
-                 return json.loads(response.read().decode())
-    except Exception:
-        pass
-    return None
+    def fetch():
+        try:
+            # 3s timeout to fail fast
+            data, response = get_json(url, timeout=3)
+        except Exception:
+            return None, False
+        return data, response.status in (200, 404)
+
+    return cached_lookup(f"{quality}:{version}", fetch)
 
 def main():
     print("Fetching tags from GitHub...")
@@ -121,26 +115,43 @@ def main():
 
     print("Processing tags and fetching metadata (from Update API)...")
     
-    count = 0
-    total = len(all_raw_tags)
-    
     # We can retry fetching dates via GitHub if Update API fails? 
     # Or just rely on Update API. Update API is usually reliable for released builds.
 
+    candidates = []
     for tag in all_raw_tags:
-        count += 1
         info = parse_version(tag['name'])
         if not info:
             continue
-            
+        # Only stable and insider builds are written out; don't spend
+        # Update API round trips on other labels (rc, alpha, ...).
+        if info[3] not in (None, 'insider'): # label
+            continue
+        candidates.append((tag, info, tag['name'].lstrip('v')))
+
+    # Alias tags (v1.19.3 / 1.19.3) resolve to the same Update API URL, so
+    # look each (version, label) up once. Not keyed on the tag commit alone:
+    # distinct versions on one commit are distinct builds with their own dates.
+    lookups = list(dict.fromkeys((version_str, info[3]) for _, info, version_str in candidates))
+    total = len(lookups)
+    load_update_cache()
+    results = parallel_map(lambda key: get_version_metadata(*key), lookups)
+
+    # Results come back in submission order, so the output is identical to a serial run.
+    meta_by_version = {}
+    try:
+        for count, (key, meta) in enumerate(zip(lookups, results), 1):
+            progress(f"[{count}/{total}] Fetching metadata for {key[0]}...", force=count == total)
+            meta_by_version[key] = meta
+    finally:
+        save_update_cache()
+
+    seen = set()
+    for tag, info, version_str in candidates:
+        meta = meta_by_version[(version_str, info[3])]
         commit_sha = tag['commit']
         # commit_url = tag['commit_url'] # Unused if we use Update API
         
-        version_str = tag['name'].lstrip('v')
-        
-        print(f"[{count}/{total}] Fetching metadata for {version_str}...", end='\r')
-        
-        meta = get_version_metadata(version_str, info['label'])
         date_val = None
         
         if meta:
@@ -152,29 +163,31 @@ def main():
             if 'version' in meta and len(meta['version']) == 40:
                 commit_sha = meta['version']
         
-        build = {
-            'version': version_str,
-            'commit': commit_sha,
-            'date': date_val,
-            'version_info': info
-        }
-
-        if info['label'] == 'insider':
-            insider_builds.append(build)
-        elif info['label'] is None:
-            stable_builds.append(build)
-            
-        # Be nice to Update API?
-        # It's robust but let's not hammer it too hard if unnecessary.
-        # It's sequential, so it's fine.
+        major, minor, patch, label = info
+        # Stable (None) > Insider (label) priority? 
+        # Usually we want Descending time.
+        # But here we sort by Version Number.
+        # 1.80.0 > 1.80.0-insider.
+        label_priority = 0 if label is None else -1 
+        entry = (major, minor, patch, label_priority, version_str, commit_sha, date_val)
+        # Alias tags (v1.19.3 / 1.19.3) resolve to the same build; keep one.
+        if (version_str, commit_sha) in seen:
+            continue
+        seen.add((version_str, commit_sha))
+
+        if label == 'insider':
+            insider_builds.append(entry)
+        elif label is None:
+            stable_builds.append(entry)
 
-    # Sort
-    stable_builds.sort(key=sort_key)
-    insider_builds.sort(key=sort_key)
+    # Plain tuple comparison is the sort order. (version, commit) is unique
+    # after the dedupe above, so date is never compared.
+    stable_builds.sort()
+    insider_builds.sort()
 
     # Clean Output
-    stable_out = [{'version': b['version'], 'commit': b['commit'], 'date': b['date']} for b in stable_builds]
-    insider_out = [{'version': b['version'], 'commit': b['commit'], 'date': b['date']} for b in insider_builds]
+    stable_out = [{'version': v, 'commit': c, 'date': d} for *_, v, c, d in stable_builds]
+    insider_out = [{'version': v, 'commit': c, 'date': d} for *_, v, c, d in insider_builds]
 
     print(f"\nFound {len(stable_out)} stable builds.")
     print(f"Found {len(insider_out)} insider builds.")
@@ -1,51 +1,37 @@
-import urllib.request
-import urllib.error
 import json
 import re
 import time
 import sys
 
+from _http import (cached_lookup, get_github_json, get_json, load_etags, load_update_cache, parallel_map,
+                   save_etags, save_update_cache)
+
 # VSCodium Insiders Repo
 RELEASES_URL = "https://api.github.com/repos/VSCodium/vscodium-insiders/releases?per_page=100&page={}"
 HISTORY_FILE = "vscodium_insider_history.json"
 MAX_PAGES = 5
 
-def fetch_json(url):
-    try:
-        req = urllib.request.Request(url)
-        with urllib.request.urlopen(req, timeout=30) as r:
-            return json.loads(r.read())
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return None
+_HASH_RE = re.compile(r"update vscode to (?:\[)?([a-f0-9]{40})", re.IGNORECASE)
+_ASSET_RE = re.compile(r"VSCodium-(darwin|linux|win32)-(arm64|x64)-.*\.(zip|tar\.gz)$")
 
-def main():
-    history = []
-    seen_commits = set()
-    
-    print(f"Scraping VSCodium Assets for Insiders...")
-    
-    for page in range(1, MAX_PAGES + 1):
-        print(f"Fetching page {page}...")
-        releases = fetch_json(RELEASES_URL.format(page))
-        if not releases:
-            break
-            
-        print(f"  Found {len(releases)} releases. Parsing...")
-        
 # Helper to get upstream VS Code metadata (borrowed from generate_vscode_history.py logic)
 def fetch_upstream_timestamp(commit_sha):
     url = f"https://update.code.visualstudio.com/api/versions/commit:{commit_sha}/darwin/insider"
-    max_retries = 3
-    for attempt in range(max_retries):
+
+    def fetch():
+        # Transient failures are retried with backoff by the pool's Retry policy.
         try:
-            data = fetch_json(url)
-            if data and 'timestamp' in data:
-                return data['timestamp'] # Returns millisecond timestamp (number)
-        except Exception:
-            pass
-        time.sleep(0.5)
-    return None
+            data, r = get_json(url, timeout=30)
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None, False
+        if r.status == 200:
+            return data.get('timestamp'), True # Returns millisecond timestamp (number)
+        if r.status != 404:
+            print(f"Error fetching {url}: HTTP {r.status}")
+        return None, r.status == 404
+
+    return cached_lookup(f"insider:commit:{commit_sha}", fetch)
 
 def main():
     history = []
@@ -53,57 +39,64 @@ def main():
     
     print(f"Scraping VSCodium Assets for Insiders...")
     
-    for page in range(1, MAX_PAGES + 1):
-        print(f"Fetching page {page}...")
-        releases = fetch_json(RELEASES_URL.format(page))
-        if not releases:
-            break
+    etags = load_etags()
+    load_update_cache()
+    # Keep the ETags and upstream dates fetched so far even if a
+    # RateLimitError aborts the run.
+    try:
+        for page in range(1, MAX_PAGES + 1):
+            print(f"Fetching page {page}...")
+            releases, _ = get_github_json(RELEASES_URL.format(page), etags)
+            if not releases:
+                break
             
-        print(f"  Found {len(releases)} releases. Parsing...")
+            print(f"  Found {len(releases)} releases. Parsing...")
         
-        for r in releases:
-            body = r.get('body', '')
-            tag_name = r.get('tag_name', 'unknown')
-            vscodium_date_str = r.get('published_at') or r.get('created_at')
+            pending = []
+            for r in releases:
+                body = r.get('body', '')
+                tag_name = r.get('tag_name', 'unknown')
+                vscodium_date_str = r.get('published_at') or r.get('created_at')
             
-            # 1. Find Hash
-            match = re.search(r"update vscode to (?:\[)?([a-f0-9]{40})", body, re.IGNORECASE)
-            if match:
-                vscode_hash = match.group(1)
+                # 1. Find Hash
+                match = _HASH_RE.search(body)
+                if match:
+                    vscode_hash = match.group(1)
                 
-                if vscode_hash in seen_commits:
-                    continue
+                    if vscode_hash in seen_commits:
+                        continue
                 
-                # 2. Find Assets
-                assets_map = {}
-                for asset in r.get('assets', []):
-                    name = asset['name']
-                    url = asset['browser_download_url']
+                    # 2. Find Assets
+                    assets_map = {}
+                    for asset in r.get('assets', []):
+                        name = asset['name']
+                        url = asset['browser_download_url']
                     
-                    if "reh" in name:
-                        continue
+                        if "reh" in name:
+                            continue
 
-                    if name.endswith(".zip") or name.endswith(".tar.gz"):
-                         if "darwin-arm64" in name and name.endswith(".zip"):
-                             assets_map["darwin_arm64"] = url
-                         elif "darwin-x64" in name and name.endswith(".zip"):
-                             assets_map["darwin_x64"] = url
-                         elif "linux-arm64" in name:
-                             assets_map["linux_arm64"] = url
-                         elif "linux-x64" in name:
-                             assets_map["linux_x64"] = url
-                         elif "win32-arm64" in name:
-                             assets_map["win32_arm64"] = url
-                         elif "win32-x64" in name:
-                             assets_map["win32_x64"] = url
+                        m = _ASSET_RE.match(name)
+                        if not m:
+                            continue
+                        # macOS builds are only consumed as .zip
+                        if m[1] == "darwin" and m[3] != "zip":
+                            continue
+                        assets_map[f"{m[1]}_{m[2]}"] = url
                 
-                if not assets_map:
-                    continue
+                    if not assets_map:
+                        continue
 
-                # 3. Fetch Upstream Date (Critical for accurate bisect)
-                print(f"    Fetching upstream date for {vscode_hash[:7]}...")
-                upstream_ts = fetch_upstream_timestamp(vscode_hash)
-                
+                    pending.append((tag_name, vscode_hash, assets_map, vscodium_date_str))
+                    seen_commits.add(vscode_hash)
+
+            # 3. Fetch Upstream Dates (Critical for accurate bisect), one page at a time in parallel
+            print(f"    Fetching upstream dates for {len(pending)} commits...")
+            hashes = [vscode_hash for _, vscode_hash, _, _ in pending]
+            ts_map = dict(zip(hashes, parallel_map(fetch_upstream_timestamp, hashes)))
+
+            for tag_name, vscode_hash, assets_map, vscodium_date_str in pending:
+                upstream_ts = ts_map[vscode_hash]
+            
                 # Use upstream timestamp if available, else fallback to VSCodium release date
                 # Note: Upstream is ms-since-epoch (int), VSCodium is ISO string.
                 # src/builds.ts handles both types.
@@ -117,13 +110,12 @@ def main():
                     "assets": assets_map
                 }
                 history.append(entry)
-                seen_commits.add(vscode_hash)
-                
-                # Rate limit politeness
-                time.sleep(0.1)
         
-        print(f"  Page {page} done. Total unique: {len(history)}")
-        time.sleep(1)
+            print(f"  Page {page} done. Total unique: {len(history)}")
+            time.sleep(1)
+    finally:
+        save_etags(etags)
+        save_update_cache()
 
     print(f"Total found: {len(history)}")
     
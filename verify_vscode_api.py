@@ -1,8 +1,8 @@
-import urllib.request
-import json
 import sys
 from datetime import datetime
 
+from _http import get_json
+
 # --- Configuration ---
 PLATFORM = 'darwin-arm64' # Hardcoded for Mac as requested
 BASE_URL = 'https://update.code.visualstudio.com'
@@ -39,10 +39,10 @@ def fetch_discovery_list(quality):
     url = f"{BASE_URL}/api/commits/{quality}/{PLATFORM}?released=true"
     log_info(f"Fetching list: {url}")
     try:
-        with urllib.request.urlopen(url) as response:
-            if response.status == 200:
-                data = json.loads(response.read().decode())
-                return data
+        data, response = get_json(url)
+        if response.status == 200:
+            return data
+        log_failure(f"Failed to fetch Discovery list for {quality}", f"HTTP {response.status}")
     except Exception as e:
         log_failure(f"Failed to fetch Discovery list for {quality}", str(e))
     return []
@@ -51,13 +51,12 @@ def fetch_build_metadata(commit, quality):
     """Fetches metadata for a specific commit (Retrieval API)."""
     url = f"{BASE_URL}/api/versions/commit:{commit}/{PLATFORM}/{quality}"
     try:
-        with urllib.request.urlopen(url) as response:
-            if response.status == 200:
-                return json.loads(response.read().decode())
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
+        data, response = get_json(url)
+        if response.status == 200:
+            return data
+        if response.status == 404:
             return None # Expected for pruned builds
-        log_failure(f"HTTP Error fetching {commit}", str(e))
+        log_failure(f"HTTP Error fetching {commit}", f"HTTP {response.status}")
     except Exception as e:
         log_failure(f"Error fetching {commit}", str(e))
     return None
@@ -1,7 +1,7 @@
-import urllib.request
-import urllib.error
 import sys
 
+from _http import POOL, parallel_map
+
 # Tags from VSCodium (hardcoded for now to test)
 tags = [
     "1.107.18537-insider",
@@ -16,24 +16,26 @@ PLATFORM = "darwin"
 QUALITY = "insider"
 
 def check(version):
+    """Returns (version, status) where status is the HTTP code or the error."""
     url = f"{BASE_URL}/{version}/{PLATFORM}/{QUALITY}"
     try:
-        req = urllib.request.Request(url, method='HEAD')
-        with urllib.request.urlopen(req, timeout=2) as response:
-            if response.status == 200:
-                print(f"[SUCCESS] {version} -> Found!")
-                return True
-    except urllib.error.HTTPError as e:
-        print(f"[FAIL] {version} -> {e.code}")
+        response = POOL.request("HEAD", url, timeout=2.0, retries=False)
+        return version, response.status
     except Exception as e:
-        print(f"[ERR] {version} -> {e}")
-    return False
+        return version, e
+
+def report(results):
+    # Printed after all checks finish so concurrent output doesn't interleave.
+    for version, status in results:
+        if status == 200:
+            print(f"[SUCCESS] {version} -> Found!")
+        elif isinstance(status, int):
+            print(f"[FAIL] {version} -> {status}")
+        else:
+            print(f"[ERR] {version} -> {status}")
 
 print("--- Testing VSCodium Tags as-is ---")
-for t in tags:
-    check(t)
+report(parallel_map(check, tags))
 
 print("\n--- Testing VSCodium Tags without '-insider' ---")
-for t in tags:
-    clean = t.replace("-insider", "")
-    check(clean)
+report(parallel_map(check, [t.replace("-insider", "") for t in tags]))